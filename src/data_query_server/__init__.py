@@ -1,11 +1,24 @@
 import asyncio
+from collections.abc import Callable
 
 from . import server
 
 
-def main():
+def _loop_factory() -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """Return uvloop's event loop factory when it is installed, else None (asyncio default)"""
+    try:
+        import uvloop
+    except ImportError:
+        return None
+    factory: Callable[[], asyncio.AbstractEventLoop] = uvloop.new_event_loop
+    return factory
+
+
+def main() -> None:
     """Main entry point for the package."""
-    asyncio.run(server.main())
+    # One loop serves both transports; uvicorn runs on it in SSE mode too
+    with asyncio.Runner(loop_factory=_loop_factory()) as runner:
+        runner.run(server.main())
 
 
 # Optionally expose other important items at package level
@@ -1,31 +1,262 @@
 import argparse
+import asyncio
+import base64
+import functools
 import os
+import re
+import threading
+import uuid
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
+from urllib.parse import parse_qs
 
 import duckdb
 import mcp.server.stdio
 import mcp.types as types
-import numpy as np
-import pandas as pd
+import msgspec
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+import sqlglot
+import uvicorn
 from mcp.server import FastMCP, NotificationOptions, Server
 from mcp.server.models import InitializationOptions
 from pydantic import AnyUrl
+from sqlglot import exp
+from starlette.applications import Starlette
+from starlette.endpoints import HTTPEndpoint
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+# Upper bound on distinct query strings kept in the parsed-statement cache
+STMT_CACHE_SIZE = 256
+
+# Statement types that can change the catalog; only these mark the schema snapshot stale
+SCHEMA_CHANGING_STATEMENTS = (exp.Create, exp.Drop, exp.Alter, exp.Attach, exp.Detach, exp.Copy)
+
+# Statement types that can change dataset contents, after which cached row counts
+# are no longer trusted
+WRITE_STATEMENTS = (
+    exp.Insert,
+    exp.Update,
+    exp.Delete,
+    exp.Merge,
+    exp.TruncateTable,
+    *SCHEMA_CHANGING_STATEMENTS,
+)
+
+# Fallback for queries sqlglot cannot parse (e.g. DuckDB's IMPORT DATABASE)
+DDL_RE = re.compile(
+    r"(?:^|;)\s*(?:CREATE|ALTER|DROP|ATTACH|DETACH|REPLACE|COPY|IMPORT)\b", re.IGNORECASE
+)
+
+# Queries without a top-level LIMIT return at most this many rows
+QUERY_MAX_ROWS = 1000
+
+# Bare row counts of a dataset, answered from its metadata instead of DuckDB
+COUNT_STAR_RE = re.compile(
+    r"^\s*select\s+count\(\s*\*\s*\)\s+(?:as\s+(\w+)\s+)?from\s+(\w+)\s*;?\s*$",
+    re.IGNORECASE,
+)
+
+# Every column of every table and view in the main schema, read in one catalog scan
+CATALOG_SQL = """
+    SELECT table_name, column_name, data_type
+    FROM duckdb_columns()
+    WHERE database_name = current_database() AND schema_name = 'main'
+    ORDER BY table_name, column_index
+"""
+
+# Statement types allowed in read-only mode; file access is blocked by DuckDB itself
+READ_ONLY_STATEMENTS = (exp.Query, exp.Describe)
+
+# Media type of sql_query results returned with response_format="arrow"
+ARROW_STREAM_MIME = "application/vnd.apache.arrow.stream"
+
+# Default Arrow batch size for stream_sql
+STREAM_BATCH_ROWS = 1024
+
+# Rows shown by execute_sql_query, and the Arrow batch size used to stream them
+PREVIEW_MAX_ROWS = 100
+PREVIEW_BATCH_ROWS = 128
+
+# Default and maximum rows returned by a dataset:// resource read
+RESOURCE_DEFAULT_ROWS = 10
+RESOURCE_MAX_ROWS = 1000
+
+# Metadata for the bundled sample datasets (row counts are filled in at load time)
+SAMPLE_DATASETS = {
+    "sales": {
+        "description": "Sales transaction data with order details",
+        "columns": ["order_id", "customer_id", "product", "quantity", "price", "order_date"],
+    },
+    "customers": {
+        "description": "Customer information and registration data",
+        "columns": ["customer_id", "name", "email", "city", "registration_date"],
+    },
+}
+
+# SELECT statements that generate the sample datasets entirely inside DuckDB
+SAMPLE_DATASET_SQL = {
+    "sales": """
+        SELECT i AS order_id,
+               format('CUST_{:03d}', i) AS customer_id,
+               ['Product A', 'Product B', 'Product C'][(i - 1) % 3 + 1] AS product,
+               (hash(i) % 9 + 1)::INTEGER AS quantity,
+               round(10 + (hash(i + 1) % 9000) / 100.0, 2) AS price,
+               DATE '2024-01-01' + (i - 1)::INTEGER AS order_date
+        FROM range(1, 101) t(i)
+    """,
+    "customers": """
+        SELECT format('CUST_{:03d}', i) AS customer_id,
+               format('Customer {}', i) AS name,
+               format('customer{}@example.com', i) AS email,
+               ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix'][(i - 1) % 5 + 1]
+                   AS city,
+               DATE '2023-01-01' + (7 * (i - 1))::INTEGER AS registration_date
+        FROM range(1, 51) t(i)
+    """,
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_sql(query: str) -> tuple[exp.Expression, ...] | None:
+    """Parse a query with sqlglot's DuckDB dialect, or None if sqlglot cannot parse it"""
+    try:
+        parsed = sqlglot.parse(query, dialect="duckdb")
+    except sqlglot.errors.SqlglotError:
+        return None
+    # Stray semicolons parse as empty (None) or Semicolon statements; they run nothing
+    return tuple(
+        statement
+        for statement in parsed
+        if isinstance(statement, exp.Expression) and not isinstance(statement, exp.Semicolon)
+    )
+
+
+def _changes_schema(query: str, statements: tuple[exp.Expression, ...] | None) -> bool:
+    """Whether a query may have changed the catalog, judged by its parsed statements"""
+    if statements is None:
+        return DDL_RE.search(query) is not None
+    return any(isinstance(statement, SCHEMA_CHANGING_STATEMENTS) for statement in statements)
+
+
+def _read_only_violation(statements: tuple[exp.Expression, ...] | None) -> str | None:
+    """Explain why a parsed query is not allowed in read-only mode, or None if it is"""
+    if not statements:
+        return "query could not be verified as read-only"
+    for statement in statements:
+        if not isinstance(statement, READ_ONLY_STATEMENTS):
+            return f"{statement.key.upper()} statements are not allowed"
+    return None
+
+
+class QueryStream:
+    """Query result read lazily from a DuckDB Arrow record batch reader"""
+
+    def __init__(
+        self, reader: pa.RecordBatchReader, cursor: duckdb.DuckDBPyConnection | None = None
+    ):
+        self.reader = reader
+        self.columns = reader.schema.names
+        self._cursor = cursor
+        self._batches: list[pa.RecordBatch] = []
+        self._fetched = 0
+        self._exhausted = False
+
+    def _fill(self, rows: int) -> None:
+        """Read batches until at least ``rows`` rows are buffered or the result ends"""
+        while self._fetched < rows and not self._exhausted:
+            try:
+                batch = self.reader.read_next_batch()
+            except StopIteration:
+                self._exhausted = True
+                break
+            self._batches.append(batch)
+            self._fetched += batch.num_rows
+
+    def preview(self, n: int) -> pa.Table:
+        """Return the first ``n`` rows, reading only as many batches as needed"""
+        self._fill(n)
+        return pa.Table.from_batches(self._batches, schema=self.reader.schema).slice(0, n)
+
+    def to_preview_rows(self, n: int) -> list[dict[str, Any]]:
+        """Return the first ``n`` rows as dicts"""
+        rows: list[dict[str, Any]] = self.preview(n).to_pylist()
+        return rows
+
+    def has_more_than(self, n: int) -> bool:
+        """Whether the result has more than ``n`` rows (reads at most one more batch)"""
+        self._fill(n + 1)
+        return self._fetched > n
+
+    def read_all(self) -> pa.Table:
+        """Read the rest of the result and return all of it"""
+        rest = self.reader.read_all()
+        self._exhausted = True
+        return pa.Table.from_batches([*self._batches, *rest.to_batches()], schema=rest.schema)
+
+    def close(self) -> None:
+        """Release the reader, and the cursor if the stream owns one"""
+        self.reader.close()
+        if self._cursor is not None:
+            self._cursor.close()
+
+    def __enter__(self) -> "QueryStream":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
 
 
 class DataQueryServer:
-    def __init__(self):
+    def __init__(self) -> None:
         self.db_path = "data/datasets.db"
-        self.conn = None
-        self.available_datasets = {}
+        self.parquet_dir = "data"
+        self.conn: duckdb.DuckDBPyConnection | None = None
+        self.available_datasets: dict[str, dict[str, Any]] = {}
+        # Reject anything but plain reads, and lock DuckDB out of the filesystem when
+        # initialize() runs
+        self.read_only = os.environ.get("DATA_QUERY_READ_ONLY", "").lower() in ("1", "true")
+        # Bumped whenever available_datasets changes, so derived caches can invalidate
+        self.datasets_version = 0
+        # Set once a statement that may write has run, so row counts in
+        # available_datasets can no longer be trusted
+        self._datasets_modified = False
+        # Bumped whenever the schema or dataset metadata may have changed; part of the
+        # cache key of formatted tool output, so results computed before a change are
+        # never served after it
+        self.schema_generation = 0
+        # query text -> parsed DuckDB statement
+        self._stmt_cache: dict[str, Any] = {}
+        # table name -> column schema, rebuilt on next use after invalidate()
+        self._schema_cache: dict[str, list[dict[str, str]]] = {}
+        # lowercased table name -> name as stored in the catalog, since DuckDB
+        # identifiers are case-insensitive
+        self._schema_names: dict[str, str] = {}
+        self._schema_dirty = True
+        # Worker threads for queries; each keeps its own cursor on the shared database
+        self._pool: ThreadPoolExecutor | None = None
+        self._local = threading.local()
+        self._stmt_lock = threading.Lock()
 
-    async def initialize(self):
+    async def initialize(self) -> None:
         """Initialize the DuckDB connection and load sample datasets"""
+        # Connecting and seeding block on DuckDB, so keep them off the event loop
+        await asyncio.to_thread(self._initialize_sync)
+
+    def _initialize_sync(self) -> None:
+        """Connect to DuckDB and load sample datasets (blocking)"""
         # Create data directory if it doesn't exist
         os.makedirs("data", exist_ok=True)
 
         # Close any existing connection
         if self.conn:
             self.conn.close()
+        self._stmt_cache.clear()
+        self.invalidate()
 
         # Initialize DuckDB connection (use memory if file is locked)
         try:
@@ -34,113 +265,412 @@ class DataQueryServer:
             print(f"Warning: Could not connect to file database ({e}), using in-memory database")
             self.conn = duckdb.connect(":memory:")
 
-        # Load sample datasets
-        await self.load_sample_datasets()
+        # Let DuckDB parallelize each query across all cores, and run queries off
+        # the event loop so concurrent requests are not serialized behind one another
+        self._configure_duckdb()
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=os.cpu_count(), thread_name_prefix="duckdb-query"
+            )
 
-    async def load_sample_datasets(self):
-        """Load sample datasets into DuckDB"""
+        # Reuse sample data persisted by an earlier run, otherwise generate it
+        if all(os.path.exists(self._parquet_path(name)) for name in SAMPLE_DATASETS):
+            if not self.reuse_existing_datasets():
+                self.attach_parquet_datasets()
+        else:
+            self._seed_sample_datasets()
+
+        if self.read_only:
+            self._restrict_file_access()
+
+    def _require_conn(self) -> duckdb.DuckDBPyConnection:
+        """Return the open DuckDB connection, or raise if the server is not initialized"""
+        if self.conn is None:
+            raise RuntimeError("Database is not initialized")
+        return self.conn
+
+    def _configure_duckdb(self) -> None:
+        """Apply DuckDB execution settings, overridable through environment variables"""
+        conn = self._require_conn()
+        settings = {
+            "threads": os.environ.get("DUCKDB_THREADS", str(os.cpu_count())),
+            "enable_object_cache": "true",
+            "temp_directory": os.environ.get("DUCKDB_TEMP_DIRECTORY", "data/tmp"),
+        }
+        # DuckDB's default (80% of RAM) applies unless a limit is configured
+        if os.environ.get("DUCKDB_MEMORY_LIMIT"):
+            settings["memory_limit"] = os.environ["DUCKDB_MEMORY_LIMIT"]
+
+        for name, value in settings.items():
+            try:
+                escaped = value.replace("'", "''")
+                conn.execute(f"SET {name} = '{escaped}'")
+            except Exception as e:
+                print(f"Warning: Could not apply DuckDB setting {name}={value} ({e})")
+
+    def _restrict_file_access(self) -> None:
+        """Let DuckDB read no files but the dataset Parquet files (read-only mode)"""
+        conn = self._require_conn()
+        # Applies to the whole database and cannot be undone while it is open; the
+        # configuration is locked so queries cannot SET it back
+        allowed = ", ".join(f"'{self._parquet_path(name)}'" for name in SAMPLE_DATASETS)
+        conn.execute(f"SET allowed_paths = [{allowed}]")
+        conn.execute("SET enable_external_access = false")
+        conn.execute("SET lock_configuration = true")
+
+    def _parquet_path(self, name: str) -> str:
+        """Path of the Parquet file backing a sample dataset"""
+        return os.path.join(self.parquet_dir, f"{name}.parquet")
+
+    def _drop_dataset_object(self, name: str) -> None:
+        """Drop a dataset's table or view so it can be recreated as either kind"""
+        conn = self._require_conn()
+        existing = conn.execute(
+            "SELECT table_type FROM information_schema.tables "
+            "WHERE table_catalog = current_database() AND table_schema = 'main' "
+            "AND table_name = ?",
+            [name],
+        ).fetchone()
+        if existing:
+            kind = "VIEW" if existing[0] == "VIEW" else "TABLE"
+            conn.execute(f"DROP {kind} {name}")
+
+    def _count_rows(self, name: str) -> int:
+        """Count the rows of a dataset's table or view"""
+        row = self._require_conn().execute(f"SELECT count(*) FROM {name}").fetchone()
+        return int(row[0]) if row else 0
+
+    def _set_dataset_metadata(self, row_counts: dict[str, int]) -> None:
+        """Store metadata for the sample datasets"""
+        self.available_datasets = {
+            name: {
+                "description": info["description"],
+                "columns": list(info["columns"]),
+                "row_count": row_counts[name],
+            }
+            for name, info in SAMPLE_DATASETS.items()
+        }
+        self._datasets_modified = False
+        self.datasets_version += 1
+
+    def reuse_existing_datasets(self) -> bool:
+        """Use the datasets already in the database if they match their Parquet files"""
         try:
-            # Sample sales data
-            sales_data = pd.DataFrame(
-                {
-                    "order_id": range(1, 101),
-                    "customer_id": [f"CUST_{i:03d}" for i in range(1, 101)],
-                    "product": ["Product A", "Product B", "Product C"] * 33 + ["Product A"],
-                    "quantity": np.random.randint(1, 10, 100),
-                    "price": np.random.uniform(10, 100, 100).round(2),
-                    "order_date": pd.date_range("2024-01-01", periods=100, freq="D"),
-                }
-            )
+            conn = self._require_conn()
+            existing = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT table_name FROM information_schema.tables "
+                    "WHERE table_catalog = current_database() AND table_schema = 'main'"
+                ).fetchall()
+            }
+            if not set(SAMPLE_DATASETS) <= existing:
+                return False
 
-            # Sample customer data
-            customer_data = pd.DataFrame(
-                {
-                    "customer_id": [f"CUST_{i:03d}" for i in range(1, 51)],
-                    "name": [f"Customer {i}" for i in range(1, 51)],
-                    "email": [f"customer{i}@example.com" for i in range(1, 51)],
-                    "city": ["New York", "Los Angeles", "Chicago", "Houston", "Phoenix"] * 10,
-                    "registration_date": pd.date_range("2023-01-01", periods=50, freq="W"),
-                }
-            )
+            row_counts = {}
+            for name in SAMPLE_DATASETS:
+                row_counts[name] = pq.read_metadata(self._parquet_path(name)).num_rows
+                if self._count_rows(name) != row_counts[name]:
+                    return False
+
+            self._set_dataset_metadata(row_counts)
+            self.invalidate()
+            self._warm_statements()
+            print(f"Reusing {len(self.available_datasets)} datasets from {self.db_path}")
+            return True
+
+        except Exception as e:
+            print(f"Warning: Could not reuse existing datasets ({e})")
+            return False
+
+    def attach_parquet_datasets(self) -> None:
+        """Expose previously persisted sample datasets as views over their Parquet files"""
+        try:
+            conn = self._require_conn()
+            row_counts = {}
+            for name in SAMPLE_DATASETS:
+                path = self._parquet_path(name)
+                self._drop_dataset_object(name)
+                conn.execute(f"CREATE VIEW {name} AS SELECT * FROM read_parquet('{path}')")
+                # Row counts come from the Parquet footer without scanning any data
+                row_counts[name] = pq.read_metadata(path).num_rows
+            self._stmt_cache.clear()
 
-            # Load into DuckDB
-            self.conn.execute("CREATE OR REPLACE TABLE sales AS SELECT * FROM sales_data")
-            self.conn.execute("CREATE OR REPLACE TABLE customers AS SELECT * FROM customer_data")
+            self._set_dataset_metadata(row_counts)
+            self.invalidate()
+            self._warm_statements()
+            print(f"Attached {len(self.available_datasets)} datasets from Parquet")
+
+        except Exception as e:
+            print(f"Error attaching Parquet datasets: {e}")
+
+    async def load_sample_datasets(self) -> None:
+        """Load sample datasets into DuckDB"""
+        await asyncio.to_thread(self._seed_sample_datasets)
+
+    def _seed_sample_datasets(self) -> None:
+        """Generate the sample datasets and persist them to Parquet (blocking)"""
+        try:
+            conn = self._require_conn()
+            # Generate the data inside DuckDB, then persist it so later starts can
+            # attach the Parquet files instead of regenerating it
+            row_counts = {}
+            for name, select in SAMPLE_DATASET_SQL.items():
+                self._drop_dataset_object(name)
+                conn.execute(f"CREATE TABLE {name} AS {select}")
+                conn.execute(
+                    f"COPY {name} TO '{self._parquet_path(name)}' "
+                    "(FORMAT PARQUET, COMPRESSION ZSTD)"
+                )
+                row_counts[name] = self._count_rows(name)
+            self._stmt_cache.clear()
 
             # Store dataset metadata
-            self.available_datasets = {
-                "sales": {
-                    "description": "Sales transaction data with order details",
-                    "columns": [
-                        "order_id",
-                        "customer_id",
-                        "product",
-                        "quantity",
-                        "price",
-                        "order_date",
-                    ],
-                    "row_count": len(sales_data),
-                },
-                "customers": {
-                    "description": "Customer information and registration data",
-                    "columns": ["customer_id", "name", "email", "city", "registration_date"],
-                    "row_count": len(customer_data),
-                },
-            }
+            self._set_dataset_metadata(row_counts)
+            self.invalidate()
+            self._warm_statements()
 
             print(f"Loaded {len(self.available_datasets)} datasets successfully")
 
         except Exception as e:
             print(f"Error loading sample datasets: {e}")
 
-    def execute_sql(self, query: str) -> dict[str, Any]:
-        """Execute SQL query and return results"""
+    def _cursor(self) -> duckdb.DuckDBPyConnection:
+        """Return the calling thread's cursor on the current connection"""
+        # DuckDB connections are not thread-safe; cursors share the database but
+        # have independent statement state, so each worker thread gets its own
+        conn = self._require_conn()
+        if getattr(self._local, "conn", None) is not conn:
+            self._local.conn = conn
+            self._local.cursor = conn.cursor()
+        cursor: duckdb.DuckDBPyConnection = self._local.cursor
+        return cursor
+
+    def _prepared(self, cursor: duckdb.DuckDBPyConnection, query: str) -> Any:
+        """Return the cached parsed statement for a query, parsing it only once"""
+        stmt = self._stmt_cache.get(query)
+        if stmt is None:
+            statements = cursor.extract_statements(query)
+            # Multi-statement strings are handed to DuckDB as-is
+            stmt = statements[0] if len(statements) == 1 else query
+            with self._stmt_lock:
+                if len(self._stmt_cache) >= STMT_CACHE_SIZE:
+                    self._stmt_cache.pop(next(iter(self._stmt_cache)))
+                self._stmt_cache[query] = stmt
+        return stmt
+
+    def preview_query(
+        self, name: str, columns: str = "*", limit: int = RESOURCE_DEFAULT_ROWS, offset: int = 0
+    ) -> str:
+        """SQL text for a dataset preview, kept canonical so its parsed statement is reused"""
+        return f"SELECT {columns} FROM {name} LIMIT {limit} OFFSET {offset}"
+
+    def _warm_statements(self) -> None:
+        """Parse the catalog and default preview queries up front"""
+        cursor = self._cursor()
+        queries = [CATALOG_SQL]
+        queries.extend(self.preview_query(name) for name in self.available_datasets)
+        for query in queries:
+            self._prepared(cursor, query)
+
+    def _checked_statements(self, query: str) -> tuple[exp.Expression, ...] | None:
+        """Parse a query (cached) and apply the read-only policy before DuckDB sees it"""
+        statements = parse_sql(query)
+        if self.read_only:
+            violation = _read_only_violation(statements)
+            if violation:
+                raise ValueError(f"Read-only mode: {violation}")
+        elif not statements or any(
+            isinstance(statement, WRITE_STATEMENTS) for statement in statements
+        ):
+            self._datasets_modified = True
+        return statements
+
+    def _count_from_metadata(self, query: str) -> pa.Table | None:
+        """Answer ``SELECT COUNT(*) FROM <dataset>`` from the known row count"""
+        match = COUNT_STAR_RE.match(query)
+        if not match or self._datasets_modified:
+            return None
+        alias, table_name = match.groups()
+        info = self.available_datasets.get(table_name)
+        if info is None:
+            return None
+        # DuckDB names an unaliased count(*) column "count_star()"
+        return pa.table({alias or "count_star()": pa.array([info["row_count"]], pa.int64())})
+
+    def stream_sql(self, query: str, batch_size: int = STREAM_BATCH_ROWS) -> "QueryStream":
+        """Execute SQL query and return its result as a lazily read Arrow batch stream"""
+        statements = self._checked_statements(query)
+        # The stream may outlive this call, so it gets a dedicated cursor rather than
+        # the thread's shared one
+        cursor = self._require_conn().cursor()
         try:
-            # Execute query
-            result = self.conn.execute(query).fetchall()
-            columns = [desc[0] for desc in self.conn.description]
+            reader = cursor.execute(query).fetch_record_batch(rows_per_batch=batch_size)
+        except Exception:
+            cursor.close()
+            raise
+        # DDL has run by the time execute() returns, same as in execute_sql
+        if _changes_schema(query, statements):
+            self.invalidate()
+        return QueryStream(reader, cursor)
+
+    def execute_sql(
+        self, query: str, max_rows: int | None = QUERY_MAX_ROWS, include_rows: bool = True
+    ) -> dict[str, Any]:
+        """Execute SQL query and return results, capped at max_rows when it has no LIMIT
+
+        With ``include_rows=False`` the result's ``data`` is None and callers read the
+        Arrow table instead, so no per-row Python objects are built.
+        """
+        try:
+            statements = self._checked_statements(query)
+
+            table = self._count_from_metadata(query)
+            if table is not None:
+                return {
+                    "success": True,
+                    "data": table.to_pylist() if include_rows else None,
+                    "columns": table.column_names,
+                    "row_count": table.num_rows,
+                    "truncated": False,
+                    "arrow": table,
+                }
+
+            capped = (
+                max_rows is not None
+                and statements is not None
+                and len(statements) == 1
+                and isinstance(statements[0], exp.Query)
+                and statements[0].args.get("limit") is None
+            )
 
-            # Convert to list of dictionaries for better JSON serialization
-            rows = []
-            for row in result:
-                rows.append(dict(zip(columns, row, strict=False)))
+            # Execute query, reusing the parsed statement for repeated query text
+            cursor = self._cursor()
+            result = cursor.execute(self._prepared(cursor, query))
+            if capped and max_rows is not None:
+                # Unbounded reads are streamed and stop one row past the cap, which
+                # tells whether anything was cut off; the query text itself runs
+                # unchanged, so its column names are the same with or without a LIMIT
+                reader = result.fetch_record_batch(rows_per_batch=STREAM_BATCH_ROWS)
+                with QueryStream(reader) as stream:
+                    table = stream.preview(max_rows + 1)
+            else:
+                table = result.fetch_arrow_table()
+            # Read-only queries leave the schema snapshot untouched
+            if _changes_schema(query, statements):
+                self.invalidate()
 
-            return {"success": True, "data": rows, "columns": columns, "row_count": len(rows)}
+            truncated = capped and table.num_rows > max_rows
+            if truncated:
+                table = table.slice(0, max_rows)
+
+            # Row dicts are built in one C-level pass, and only when asked for; the
+            # Arrow table is kept so callers that only need a preview (or IPC) can
+            # slice it without copying
+            return {
+                "success": True,
+                "data": table.to_pylist() if include_rows else None,
+                "columns": table.column_names,
+                "row_count": table.num_rows,
+                "truncated": truncated,
+                "arrow": table,
+            }
 
         except Exception as e:
-            return {"success": False, "error": str(e), "data": [], "columns": [], "row_count": 0}
+            return {
+                "success": False,
+                "error": str(e),
+                "data": [],
+                "columns": [],
+                "row_count": 0,
+                "truncated": False,
+                "arrow": None,
+            }
 
-    def get_table_info(self, table_name: str = None) -> dict[str, Any]:
+    async def execute_sql_async(
+        self, query: str, max_rows: int | None = QUERY_MAX_ROWS, include_rows: bool = True
+    ) -> dict[str, Any]:
+        """Execute SQL query on the worker pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, self.execute_sql, query, max_rows, include_rows
+        )
+
+    def invalidate(self) -> None:
+        """Mark the cached schema snapshot stale so it is re-read on next use"""
+        self._schema_changed()
+        self._schema_dirty = True
+
+    def _schema_changed(self) -> None:
+        """Retire tool output formatted from the snapshot and dataset metadata"""
+        self.schema_generation += 1
+
+    def _schema_snapshot(self) -> dict[str, list[dict[str, str]]]:
+        """Return table name -> column schema for every table, reading it only once"""
+        if self._schema_dirty:
+            # Cleared before reading, so DDL that lands mid-refresh marks it stale again
+            self._schema_dirty = False
+            cursor = self._cursor()
+            snapshot: dict[str, list[dict[str, str]]] = {}
+            for table, column, data_type in cursor.execute(
+                self._prepared(cursor, CATALOG_SQL)
+            ).fetchall():
+                snapshot.setdefault(table, []).append({"column": column, "type": data_type})
+            self._schema_names = {table.lower(): table for table in snapshot}
+            self._schema_cache = snapshot
+        return self._schema_cache
+
+    def get_table_info(self, table_name: str | None = None) -> dict[str, Any]:
         """Get information about tables in the database"""
         try:
+            snapshot = self._schema_snapshot()
             if table_name:
-                # Get specific table info
-                schema_query = f"DESCRIBE {table_name}"
-                schema_result = self.conn.execute(schema_query).fetchall()
+                # Only names in the catalog are described, so the table name never
+                # reaches SQL text; re-read the catalog once in case it changed
+                # without passing through execute_sql
+                if table_name.lower() not in self._schema_names:
+                    stale = snapshot
+                    self._schema_dirty = True
+                    snapshot = self._schema_snapshot()
+                    # Unknown names are not a schema change; formatted output only
+                    # goes if the catalog really did change underneath it
+                    if snapshot != stale:
+                        self._schema_changed()
+                name = self._schema_names.get(table_name.lower())
+                schema = snapshot.get(name) if name is not None else None
+                if name is None or schema is None:
+                    return {"error": f"Table not found: {table_name}"}
 
                 return {
-                    "table": table_name,
-                    "schema": [{"column": row[0], "type": row[1]} for row in schema_result],
-                    "metadata": self.available_datasets.get(table_name, {}),
+                    "table": name,
+                    "schema": schema,
+                    "metadata": self.available_datasets.get(name, {}),
                 }
             else:
                 # Get all tables
-                tables_query = "SHOW TABLES"
-                tables_result = self.conn.execute(tables_query).fetchall()
-
                 return {
-                    "tables": [row[0] for row in tables_result],
+                    "tables": list(snapshot),
                     "datasets_info": self.available_datasets,
                 }
 
         except Exception as e:
             return {"error": str(e)}
 
-    def cleanup(self):
+    async def get_table_info_async(self, table_name: str | None = None) -> dict[str, Any]:
+        """Get table information on the worker pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self.get_table_info, table_name)
+
+    def cleanup(self) -> None:
         """Clean up database connection"""
         if self.conn:
             self.conn.close()
             self.conn = None
+        if self._pool:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        self._stmt_cache.clear()
+        self.invalidate()
 
 
 # Initialize the data server
@@ -148,9 +678,19 @@ data_server = DataQueryServer()
 server = Server("data-query-server")
 
 
+# Listings are rebuilt only when their inputs change: tools never do, and
+# resources are tagged with the datasets_version they were built from
+_TOOLS_CACHE: list[types.Tool] | None = None
+_RESOURCES_CACHE: tuple[int, list[types.Resource]] | None = None
+
+
 @server.list_resources()
 async def handle_list_resources() -> list[types.Resource]:
     """List available dataset resources"""
+    global _RESOURCES_CACHE
+    if _RESOURCES_CACHE is not None and _RESOURCES_CACHE[0] == data_server.datasets_version:
+        return _RESOURCES_CACHE[1]
+
     resources = []
 
     for dataset_name, info in data_server.available_datasets.items():
@@ -173,26 +713,70 @@ async def handle_list_resources() -> list[types.Resource]:
         )
     )
 
+    _RESOURCES_CACHE = (data_server.datasets_version, resources)
     return resources
 
 
+def _to_json(obj: Any) -> str:
+    """Serialize a resource payload to JSON text"""
+    return orjson.dumps(
+        obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+    ).decode()
+
+
+def _int_param(params: dict[str, list[str]], name: str, default: int, maximum: int) -> int:
+    """Read a non-negative integer URI query parameter"""
+    if name not in params:
+        return default
+    value = params[name][0]
+    if not value.isdigit() or int(value) > maximum:
+        raise ValueError(f"Invalid {name}: {value} (expected an integer from 0 to {maximum})")
+    return int(value)
+
+
+def _build_dataset_query(dataset_name: str, params: dict[str, list[str]]) -> str:
+    """Build the preview query for a dataset resource, pushing down columns/limit/offset"""
+    columns = "*"
+    if "cols" in params:
+        requested = [col.strip() for col in params["cols"][0].split(",") if col.strip()]
+        known = data_server.available_datasets[dataset_name]["columns"]
+        unknown = [col for col in requested if col not in known]
+        if unknown:
+            raise ValueError(f"Unknown column(s) for {dataset_name}: {', '.join(unknown)}")
+        if requested:
+            columns = ", ".join(f'"{col}"' for col in requested)
+
+    limit = _int_param(params, "limit", RESOURCE_DEFAULT_ROWS, RESOURCE_MAX_ROWS)
+    offset = _int_param(params, "offset", 0, 2**63 - 1)
+    return data_server.preview_query(dataset_name, columns, limit, offset)
+
+
 @server.read_resource()
 async def handle_read_resource(uri: AnyUrl) -> str:
-    """Read dataset or schema information"""
+    """Read dataset or schema information
+
+    Dataset URIs accept ``cols``, ``limit`` and ``offset`` query parameters
+    (e.g. ``dataset://sales?cols=product,price&limit=5``), and the schema URI
+    accepts ``table`` to describe a single table (``schema://all?table=sales``).
+    """
+    params = parse_qs(uri.query or "")
+
     if uri.scheme == "dataset":
         dataset_name = uri.host
         if dataset_name in data_server.available_datasets:
-            # Return sample of the dataset
-            query = f"SELECT * FROM {dataset_name} LIMIT 10"
-            result = data_server.execute_sql(query)
-            return str(result)
+            # Return a sample of the dataset
+            query = _build_dataset_query(dataset_name, params)
+            result = await data_server.execute_sql_async(query)
+            result.pop("arrow")
+            return _to_json(result)
         else:
             raise ValueError(f"Dataset not found: {dataset_name}")
 
     elif uri.scheme == "schema":
-        # Return complete schema information
-        schema_info = data_server.get_table_info()
-        return str(schema_info)
+        # Return schema information for one table, or for all of them
+        table_name = params["table"][0] if "table" in params else None
+        schema_info = await data_server.get_table_info_async(table_name)
+        return _to_json(schema_info)
 
     else:
         raise ValueError(f"Unsupported URI scheme: {uri.scheme}")
@@ -201,14 +785,26 @@ async def handle_read_resource(uri: AnyUrl) -> str:
 @server.list_tools()
 async def handle_list_tools() -> list[types.Tool]:
     """List available SQL query tools"""
-    return [
+    global _TOOLS_CACHE
+    if _TOOLS_CACHE is not None:
+        return _TOOLS_CACHE
+
+    _TOOLS_CACHE = [
         types.Tool(
             name="sql_query",
             description="Execute a SQL query against the available datasets",
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "query": {"type": "string", "description": "The SQL query to execute"}
+                    "query": {"type": "string", "description": "The SQL query to execute"},
+                    "response_format": {
+                        "type": "string",
+                        "enum": ["text", "arrow"],
+                        "description": (
+                            "Return a text preview (default) or the full result as a "
+                            "base64-encoded Arrow IPC stream"
+                        ),
+                    },
                 },
                 "required": ["query"],
             },
@@ -233,6 +829,62 @@ async def handle_list_tools() -> list[types.Tool]:
             },
         ),
     ]
+    return _TOOLS_CACHE
+
+
+def _arrow_ipc_resource(table: pa.Table) -> types.EmbeddedResource:
+    """Wrap a result table as an embedded Arrow IPC stream resource"""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return types.EmbeddedResource(
+        type="resource",
+        resource=types.BlobResourceContents(
+            uri=AnyUrl("query://sql_query/result"),
+            mimeType=ARROW_STREAM_MIME,
+            blob=base64.b64encode(sink.getvalue()).decode(),
+        ),
+    )
+
+
+# Both formatters take data_server.schema_generation as read before they start: a
+# result that races with a schema change is stored under the old generation and is
+# never looked up again
+@functools.lru_cache(maxsize=64)
+def _format_describe(table_name: str, generation: int) -> str:
+    """Format the describe_table response; errors are raised so they are not cached"""
+    table_info = data_server.get_table_info(table_name)
+    if "error" in table_info:
+        raise LookupError(table_info["error"])
+
+    parts = [f"Table: {table_info['table']}\n\n", "Schema:\n"]
+    parts.extend(f"  - {col['column']}: {col['type']}\n" for col in table_info["schema"])
+
+    if "metadata" in table_info and table_info["metadata"]:
+        metadata = table_info["metadata"]
+        parts.append("\nMetadata:\n")
+        parts.append(f"  - Description: {metadata.get('description', 'N/A')}\n")
+        parts.append(f"  - Row count: {metadata.get('row_count', 'N/A')}\n")
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=1)
+def _format_list_tables(generation: int) -> str:
+    """Format the list_tables response; errors are raised so they are not cached"""
+    table_info = data_server.get_table_info()
+    if "error" in table_info:
+        raise LookupError(table_info["error"])
+
+    parts = ["Available tables:\n\n"]
+    for table in table_info["tables"]:
+        info = table_info["datasets_info"].get(table, {})
+        parts.append(
+            f"• {table}\n"
+            f"  Description: {info.get('description', 'N/A')}\n"
+            f"  Columns: {', '.join(info.get('columns', []))}\n"
+            f"  Rows: {info.get('row_count', 'N/A')}\n\n"
+        )
+    return "".join(parts)
 
 
 @server.call_tool()
@@ -246,21 +898,37 @@ async def handle_call_tool(
             raise ValueError("Missing SQL query")
 
         query = arguments["query"]
-        result = data_server.execute_sql(query)
+        arrow_format = arguments.get("response_format") == "arrow"
+        # The Arrow stream carries the full result; only the text preview is capped
+        # Both formats read the Arrow table, so no row dicts are built
+        result = await data_server.execute_sql_async(
+            query, max_rows=None if arrow_format else QUERY_MAX_ROWS, include_rows=False
+        )
+
+        if result["success"] and arrow_format:
+            return [_arrow_ipc_resource(result["arrow"])]
 
         if result["success"]:
-            response_text = "Query executed successfully!\n\n"
-            response_text += f"Columns: {', '.join(result['columns'])}\n"
-            response_text += f"Rows returned: {result['row_count']}\n\n"
-
-            if result["data"]:
-                response_text += "Results:\n"
-                # Show first few rows
-                for i, row in enumerate(result["data"][:10]):
-                    response_text += f"Row {i + 1}: {row}\n"
-
-                if len(result["data"]) > 10:
-                    response_text += f"... and {len(result['data']) - 10} more rows\n"
+            parts = [
+                "Query executed successfully!\n\n",
+                f"Columns: {', '.join(result['columns'])}\n",
+                f"Rows returned: {result['row_count']}\n",
+            ]
+            if result["truncated"]:
+                parts.append(
+                    f"(Result truncated to {result['row_count']} rows; add a LIMIT to control this)\n"
+                )
+            parts.append("\n")
+
+            if result["row_count"]:
+                parts.append("Results:\n")
+                # Show first few rows, formatting only the displayed slice column-wise
+                preview = result["arrow"].slice(0, 10).to_pandas()
+                parts.append(preview.to_string(index=False) + "\n")
+
+                if result["row_count"] > 10:
+                    parts.append(f"... and {result['row_count'] - 10} more rows\n")
+            response_text = "".join(parts)
         else:
             response_text = f"Query failed: {result['error']}"
 
@@ -271,37 +939,25 @@ async def handle_call_tool(
             raise ValueError("Missing table name")
 
         table_name = arguments["table_name"]
-        table_info = data_server.get_table_info(table_name)
-
-        if "error" in table_info:
-            response_text = f"Error describing table: {table_info['error']}"
-        else:
-            response_text = f"Table: {table_info['table']}\n\n"
-            response_text += "Schema:\n"
-            for col in table_info["schema"]:
-                response_text += f"  - {col['column']}: {col['type']}\n"
-
-            if "metadata" in table_info and table_info["metadata"]:
-                metadata = table_info["metadata"]
-                response_text += "\nMetadata:\n"
-                response_text += f"  - Description: {metadata.get('description', 'N/A')}\n"
-                response_text += f"  - Row count: {metadata.get('row_count', 'N/A')}\n"
+        # Formatted text is cached per schema generation
+        loop = asyncio.get_running_loop()
+        try:
+            response_text = await loop.run_in_executor(
+                data_server._pool, _format_describe, table_name, data_server.schema_generation
+            )
+        except LookupError as e:
+            response_text = f"Error describing table: {e}"
 
         return [types.TextContent(type="text", text=response_text)]
 
     elif name == "list_tables":
-        table_info = data_server.get_table_info()
-
-        if "error" in table_info:
-            response_text = f"Error listing tables: {table_info['error']}"
-        else:
-            response_text = "Available tables:\n\n"
-            for table in table_info["tables"]:
-                info = table_info["datasets_info"].get(table, {})
-                response_text += f"• {table}\n"
-                response_text += f"  Description: {info.get('description', 'N/A')}\n"
-                response_text += f"  Columns: {', '.join(info.get('columns', []))}\n"
-                response_text += f"  Rows: {info.get('row_count', 'N/A')}\n\n"
+        loop = asyncio.get_running_loop()
+        try:
+            response_text = await loop.run_in_executor(
+                data_server._pool, _format_list_tables, data_server.schema_generation
+            )
+        except LookupError as e:
+            response_text = f"Error listing tables: {e}"
 
         return [types.TextContent(type="text", text=response_text)]
 
@@ -309,7 +965,7 @@ async def handle_call_tool(
         raise ValueError(f"Unknown tool: {name}")
 
 
-async def main():
+async def main() -> None:
     """Main entry point for the server"""
     parser = argparse.ArgumentParser(description="Data Query MCP Server")
     parser.add_argument(
@@ -340,7 +996,7 @@ async def main():
         await run_stdio_server()
 
 
-async def run_stdio_server():
+async def run_stdio_server() -> None:
     """Run the server using stdio transport"""
     # Initialize the data server
     await data_server.initialize()
@@ -361,174 +1017,211 @@ async def run_stdio_server():
         )
 
 
-async def run_sse_server(host: str, port: int):
-    """Run the server using SSE transport over HTTP"""
-    # Initialize the data server
-    await data_server.initialize()
-    
-    print(f"Starting MCP server on http://{host}:{port}")
-    print(f"SSE endpoint will be available at: http://{host}:{port}/sse")
-    print(f"Message endpoint will be available at: http://{host}:{port}/messages")
-    
-    # Import the required modules for manual SSE setup
-    from starlette.applications import Starlette
-    from starlette.routing import Route
-    from starlette.responses import Response, JSONResponse
-    from starlette.endpoints import HTTPEndpoint
-    import json
-    import uuid
-    
-    class SSEEndpoint(HTTPEndpoint):
-        async def get(self, request):
-            # SSE endpoint for MCP connections
-            return Response(
-                "event: connected\ndata: MCP server ready\n\n",
-                media_type="text/event-stream",
-                headers={
-                    "Cache-Control": "no-cache",
-                    "Connection": "keep-alive",
-                    "Access-Control-Allow-Origin": "*",
+class RpcError(msgspec.Struct):
+    """JSON-RPC error object"""
+
+    code: int
+    message: str
+
+
+class RpcOk(msgspec.Struct, kw_only=True):
+    """Successful JSON-RPC response envelope"""
+
+    jsonrpc: str = "2.0"
+    id: int | str | None = None
+    result: Any = None
+
+
+class RpcErr(msgspec.Struct, kw_only=True):
+    """Failed JSON-RPC response envelope"""
+
+    jsonrpc: str = "2.0"
+    id: int | str | None = None
+    error: RpcError
+
+
+# Shared encoder for JSON-RPC envelopes; values msgspec does not know (e.g. URLs)
+# are encoded as strings
+rpc_encoder = msgspec.json.Encoder(enc_hook=str)
+
+# Pre-encoded JSON payloads for tools/list and resources/list; the resources payload
+# is tagged with the data_server.datasets_version it was built from
+_ENCODED_TOOLS: msgspec.Raw | None = None
+_ENCODED_RESOURCES: tuple[int, msgspec.Raw] | None = None
+
+
+async def encoded_tools() -> msgspec.Raw:
+    """Return the tools/list payload, encoding it on first use"""
+    global _ENCODED_TOOLS
+    if _ENCODED_TOOLS is None:
+        tools = await handle_list_tools()
+        _ENCODED_TOOLS = msgspec.Raw(rpc_encoder.encode([tool.model_dump() for tool in tools]))
+    return _ENCODED_TOOLS
+
+
+async def encoded_resources() -> msgspec.Raw:
+    """Return the resources/list payload, re-encoding it when the datasets change"""
+    global _ENCODED_RESOURCES
+    version = data_server.datasets_version
+    if _ENCODED_RESOURCES is None or _ENCODED_RESOURCES[0] != version:
+        resources = await handle_list_resources()
+        payload = rpc_encoder.encode(
+            [
+                {
+                    "uri": str(resource.uri),
+                    "name": resource.name,
+                    "description": resource.description,
+                    "mimeType": resource.mimeType,
                 }
-            )
-    
-    class MessageEndpoint(HTTPEndpoint):
-        async def post(self, request):
-            # MCP message endpoint that handles JSON-RPC requests
+                for resource in resources
+            ]
+        )
+        _ENCODED_RESOURCES = (version, msgspec.Raw(payload))
+    return _ENCODED_RESOURCES[1]
+
+
+# Open SSE streams, keyed by the session_id cookie handed out by the /sse endpoint
+sse_sessions: dict[str, asyncio.Queue[bytes]] = {}
+SSE_KEEPALIVE_SECONDS = 15
+
+
+async def sse_stream(session_id: str, queue: asyncio.Queue[bytes]) -> AsyncIterator[bytes]:
+    """Yield server-sent events for one session until the client disconnects"""
+    try:
+        yield b"event: connected\ndata: MCP server ready\n\n"
+        while True:
             try:
-                data = await request.json()
-                method = data.get("method")
-                params = data.get("params", {})
-                request_id = data.get("id")
-                
-                # Handle different MCP methods
-                if method == "initialize":
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "capabilities": {
-                                "tools": {"listChanged": False},
-                                "resources": {"subscribe": False, "listChanged": False}
-                            },
-                            "serverInfo": {
-                                "name": "data-query-server",
-                                "version": "0.1.0"
-                            }
-                        }
-                    }
-                
-                elif method == "tools/list":
-                    tools = await handle_list_tools()
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "tools": [tool.model_dump() for tool in tools]
-                        }
-                    }
-                
-                elif method == "tools/call":
-                    tool_name = params.get("name")
-                    arguments = params.get("arguments", {})
-                    
-                    try:
-                        result = await handle_call_tool(tool_name, arguments)
-                        response = {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "result": {
-                                "content": [content.model_dump() for content in result]
-                            }
-                        }
-                    except Exception as e:
-                        response = {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "error": {
-                                "code": -32603,
-                                "message": str(e)
-                            }
-                        }
-                
-                elif method == "resources/list":
-                    resources = await handle_list_resources()
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "resources": [
-                                {
-                                    "uri": str(resource.uri),
-                                    "name": resource.name,
-                                    "description": resource.description,
-                                    "mimeType": resource.mimeType
-                                } for resource in resources
-                            ]
-                        }
-                    }
-                
-                elif method == "resources/read":
-                    uri = params.get("uri")
-                    try:
-                        from pydantic import AnyUrl
-                        content = await handle_read_resource(AnyUrl(uri))
-                        response = {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "result": {
-                                "contents": [{
-                                    "uri": uri,
-                                    "mimeType": "application/json",
-                                    "text": content
-                                }]
-                            }
-                        }
-                    except Exception as e:
-                        response = {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "error": {
-                                "code": -32603,
-                                "message": str(e)
-                            }
-                        }
-                
-                else:
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "error": {
-                            "code": -32601,
-                            "message": f"Method not found: {method}"
-                        }
-                    }
-                
-                return JSONResponse(response)
-                
-            except Exception as e:
-                return JSONResponse(
-                    {
-                        "jsonrpc": "2.0",
-                        "id": None,
-                        "error": {
-                            "code": -32700,
-                            "message": f"Parse error: {str(e)}"
-                        }
+                message = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+            except TimeoutError:
+                # Comment line keeps idle connections (and proxies) from timing out
+                yield b": keep-alive\n\n"
+                continue
+            yield b"data: " + message + b"\n\n"
+    finally:
+        if sse_sessions.get(session_id) is queue:
+            del sse_sessions[session_id]
+
+
+class SSEEndpoint(HTTPEndpoint):
+    async def get(self, request: Request) -> Response:
+        # SSE endpoint for MCP connections; the stream stays open and carries
+        # responses to messages posted with the same session cookie
+        session_id = request.cookies.get("session_id") or uuid.uuid4().hex
+        queue: asyncio.Queue[bytes] = asyncio.Queue()
+        sse_sessions[session_id] = queue
+        response = StreamingResponse(
+            sse_stream(session_id, queue),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "Access-Control-Allow-Origin": "*",
+            },
+        )
+        response.set_cookie("session_id", session_id, httponly=True)
+        return response
+
+
+class MessageEndpoint(HTTPEndpoint):
+    async def post(self, request: Request) -> Response:
+        # MCP message endpoint that handles JSON-RPC requests
+        try:
+            data = await request.json()
+            method = data.get("method")
+            params = data.get("params", {})
+            request_id = data.get("id")
+            response: RpcOk | RpcErr
+
+            # Handle different MCP methods
+            if method == "initialize":
+                response = RpcOk(
+                    id=request_id,
+                    result={
+                        "capabilities": {
+                            "tools": {"listChanged": False},
+                            "resources": {"subscribe": False, "listChanged": False},
+                        },
+                        "serverInfo": {"name": "data-query-server", "version": "0.1.0"},
                     },
-                    status_code=400
                 )
-    
-    # Create Starlette app with MCP-compatible routes
-    starlette_app = Starlette(routes=[
+
+            elif method == "tools/list":
+                response = RpcOk(id=request_id, result={"tools": await encoded_tools()})
+
+            elif method == "tools/call":
+                tool_name = params.get("name")
+                arguments = params.get("arguments", {})
+
+                try:
+                    result = await handle_call_tool(tool_name, arguments)
+                    response = RpcOk(
+                        id=request_id,
+                        result={"content": [content.model_dump() for content in result]},
+                    )
+                except Exception as e:
+                    response = RpcErr(id=request_id, error=RpcError(-32603, str(e)))
+
+            elif method == "resources/list":
+                response = RpcOk(id=request_id, result={"resources": await encoded_resources()})
+
+            elif method == "resources/read":
+                uri = params.get("uri")
+                try:
+                    content = await handle_read_resource(AnyUrl(uri))
+                    response = RpcOk(
+                        id=request_id,
+                        result={
+                            "contents": [
+                                {"uri": uri, "mimeType": "application/json", "text": content}
+                            ]
+                        },
+                    )
+                except Exception as e:
+                    response = RpcErr(id=request_id, error=RpcError(-32603, str(e)))
+
+            else:
+                response = RpcErr(
+                    id=request_id, error=RpcError(-32601, f"Method not found: {method}")
+                )
+
+            body = rpc_encoder.encode(response)
+
+            # Deliver over the client's open SSE stream when it has one
+            queue = sse_sessions.get(request.cookies.get("session_id", ""))
+            if queue is not None:
+                queue.put_nowait(body)
+                return Response(status_code=202)
+            return Response(body, media_type="application/json")
+
+        except Exception as e:
+            return Response(
+                rpc_encoder.encode(RpcErr(error=RpcError(-32700, f"Parse error: {str(e)}"))),
+                status_code=400,
+                media_type="application/json",
+            )
+
+
+# Starlette app with MCP-compatible routes, built once at import time
+starlette_app = Starlette(
+    routes=[
         Route("/sse", SSEEndpoint),
         Route("/messages", MessageEndpoint, methods=["POST"]),
-    ])
-    
-    # Run with uvicorn using specified host/port
-    import uvicorn
+    ]
+)
+
+
+async def run_sse_server(host: str, port: int) -> None:
+    """Run the server using SSE transport over HTTP"""
+    # Initialize the data server
+    await data_server.initialize()
+
+    print(f"Starting MCP server on http://{host}:{port}")
+    print(f"SSE endpoint will be available at: http://{host}:{port}/sse")
+    print(f"Message endpoint will be available at: http://{host}:{port}/messages")
+
+    # Serve on the already-running event loop with uvicorn
     config = uvicorn.Config(starlette_app, host=host, port=port, log_level="info")
-    uvicorn_server = uvicorn.Server(config)
-    await uvicorn_server.serve()
+    await uvicorn.Server(config).serve()
 
 
 # Tool functions that will be used by both stdio and FastMCP
@@ -538,22 +1231,27 @@ async def execute_sql_query(query: str) -> str:
         if not data_server.conn:
             await data_server.initialize()
             
-        # Execute the query
-        result = data_server.conn.execute(query).fetchdf()
-        
+        def read_preview() -> tuple[pa.Table, bool]:
+            # Stream the result and stop once one row past the preview limit is read,
+            # so large results are never fully materialized
+            with data_server.stream_sql(query, batch_size=PREVIEW_BATCH_ROWS) as stream:
+                return stream.preview(PREVIEW_MAX_ROWS), stream.has_more_than(PREVIEW_MAX_ROWS)
+
+        # The stream has its own cursor, so it can run on a worker thread alongside
+        # other requests
+        loop = asyncio.get_running_loop()
+        preview, more = await loop.run_in_executor(data_server._pool, read_preview)
+
         # Format the result as a string
-        if result.empty:
+        if preview.num_rows == 0:
             return "Query executed successfully but returned no results."
-        else:
-            # Convert to string with a reasonable limit
-            if len(result) > 100:
-                result_str = result.head(100).to_string(index=False)
-                result_str += f"\n\n... (showing first 100 of {len(result)} rows)"
-            else:
-                result_str = result.to_string(index=False)
-            
-            return result_str
-            
+
+        parts = [preview.to_pandas(self_destruct=True).to_string(index=False)]
+        if more:
+            parts.append(f"\n\n... (showing first {PREVIEW_MAX_ROWS} rows)")
+
+        return "".join(parts)
+
     except Exception as e:
         return f"Error executing query: {str(e)}"
 
@@ -564,23 +1262,28 @@ async def list_available_tables() -> str:
         if not data_server.conn:
             await data_server.initialize()
             
-        # Get list of tables
-        tables = data_server.conn.execute("SHOW TABLES").fetchdf()
+        def describe_tables() -> list[tuple[str, Any]]:
+            # Runs on a worker thread with that thread's own cursor rather than the
+            # shared connection
+            cursor = data_server._cursor()
+            tables = cursor.execute("SHOW TABLES").fetchdf()
+            return [
+                (table_name, cursor.execute(f'DESCRIBE "{table_name}"').fetchdf())
+                for table_name in tables["name"]
+            ]
+
+        loop = asyncio.get_running_loop()
+        schemas = await loop.run_in_executor(data_server._pool, describe_tables)
         
-        if tables.empty:
+        if not schemas:
             return "No tables available in the database."
         
-        response_text = "Available tables and their schemas:\n\n"
+        parts = ["Available tables and their schemas:\n\n"]
         
-        for table_name in tables['name']:
-            # Get table schema
-            schema = data_server.conn.execute(f"DESCRIBE {table_name}").fetchdf()
-            
-            response_text += f"**{table_name}**\n"
-            response_text += schema.to_string(index=False)
-            response_text += "\n\n"
+        for table_name, schema in schemas:
+            parts.append(f"**{table_name}**\n{schema.to_string(index=False)}\n\n")
             
-        return response_text
+        return "".join(parts)
         
     except Exception as e:
         return f"Error listing tables: {str(e)}"
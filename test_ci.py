@@ -4,30 +4,34 @@ Simple test script that mimics GitHub Actions tests
 """
 
 import asyncio
-import subprocess
 import sys
 
 
-def run_command(cmd, description):
+async def run_command_async(cmd, description):
     """Run a command and return True if successful"""
-    print(f"\n🔍 {description}")
-    print(f"Running: {cmd}")
-
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f"✅ {description} - PASSED")
-            if result.stdout.strip():
-                print(f"Output: {result.stdout.strip()}")
-            return True
-        else:
-            print(f"❌ {description} - FAILED")
-            print(f"Error: {result.stderr.strip()}")
-            return False
+        proc = await asyncio.create_subprocess_shell(
+            cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await proc.communicate()
     except Exception as e:
+        print(f"\n🔍 {description}")
         print(f"❌ {description} - ERROR: {e}")
         return False
 
+    # Commands run concurrently, so each one's report is printed in one piece
+    print(f"\n🔍 {description}")
+    print(f"Running: {cmd}")
+    if proc.returncode == 0:
+        print(f"✅ {description} - PASSED")
+        if stdout.strip():
+            print(f"Output: {stdout.decode().strip()}")
+        return True
+    else:
+        print(f"❌ {description} - FAILED")
+        print(f"Error: {stderr.decode().strip()}")
+        return False
+
 
 async def test_server_functionality():
     """Test server initialization and basic functionality"""
@@ -66,7 +70,7 @@ async def test_server_functionality():
         return False
 
 
-def main():
+async def main():
     """Main test function"""
     print("🚀 Starting MCP Data Query Server Tests")
 
@@ -78,15 +82,14 @@ def main():
         ("uv run pytest tests/test_server.py -v", "Server unit tests"),
     ]
 
-    results = []
-
-    # Run command-based tests
-    for cmd, description in tests:
-        results.append(run_command(cmd, description))
+    # Run command-based tests concurrently; they share no state
+    results = list(
+        await asyncio.gather(*[run_command_async(cmd, description) for cmd, description in tests])
+    )
 
-    # Run async server functionality test
+    # Run async server functionality test once the pytest run has released the database
     print("\n" + "="*60)
-    server_result = asyncio.run(test_server_functionality())
+    server_result = await test_server_functionality()
     results.append(server_result)
 
     # Summary
@@ -115,4 +118,4 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(asyncio.run(main()))
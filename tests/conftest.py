@@ -1,14 +1,14 @@
 """
 Test fixtures and configuration for pytest
 """
-import asyncio
-
 import pytest
 
-from data_query_server.server import DataQueryServer, data_server
+from data_query_server.server import SAMPLE_DATASETS, DataQueryServer, data_server
+
+SHARED_SERVER_FIXTURES = ("data_server_instance", "initialized_global_server")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 async def data_server_instance():
     """Fixture that provides an initialized DataQueryServer instance"""
     server = DataQueryServer()
@@ -17,7 +17,7 @@ async def data_server_instance():
     server.cleanup()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 async def initialized_global_server():
     """Fixture that initializes the global data_server instance"""
     await data_server.initialize()
@@ -25,9 +25,31 @@ async def initialized_global_server():
     data_server.cleanup()
 
 
-@pytest.fixture
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+@pytest.fixture(autouse=True)
+def reset_state(request):
+    """Undo dataset changes a test made to a session-scoped server"""
+    servers = [
+        request.getfixturevalue(name)
+        for name in SHARED_SERVER_FIXTURES
+        if name in request.fixturenames
+    ]
+    yield
+    for server in servers:
+        server.read_only = False
+        # Drop anything a test created, even if it failed before its own cleanup
+        leftovers = [
+            name
+            for (name,) in server.conn.execute(
+                "SELECT table_name FROM information_schema.tables "
+                "WHERE table_catalog = current_database() AND table_schema = 'main'"
+            ).fetchall()
+            if name not in SAMPLE_DATASETS
+        ]
+        for name in leftovers:
+            server._drop_dataset_object(name)
+        if leftovers:
+            server.invalidate()
+        # Queries run on per-thread cursors, so one transaction cannot cover a
+        # test; re-attaching the Parquet files restores the datasets instead
+        if server._datasets_modified:
+            server.attach_parquet_datasets()
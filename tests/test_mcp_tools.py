@@ -1,15 +1,30 @@
 """
 Integration tests for MCP tools functionality
 """
+import asyncio
+import base64
+import json
+
 import mcp.types as types
+import pyarrow as pa
 import pytest
 from pydantic import AnyUrl
+from starlette.testclient import TestClient
 
 from data_query_server.server import (
+    RpcOk,
+    _format_describe,
+    encoded_resources,
+    encoded_tools,
+    execute_sql_query,
     handle_call_tool,
     handle_list_resources,
     handle_list_tools,
     handle_read_resource,
+    rpc_encoder,
+    sse_sessions,
+    sse_stream,
+    starlette_app,
 )
 
 
@@ -31,6 +46,30 @@ class TestMCPTools:
         assert "query" in sql_tool.inputSchema["properties"]
         assert sql_tool.inputSchema["required"] == ["query"]
 
+    async def test_listings_cached(self, initialized_global_server):
+        """Test that tool and resource listings are reused until the datasets change"""
+        assert await handle_list_tools() is await handle_list_tools()
+
+        resources = await handle_list_resources()
+        assert await handle_list_resources() is resources
+
+        await initialized_global_server.load_sample_datasets()
+        assert await handle_list_resources() is not resources
+
+    async def test_encoded_tools(self):
+        """Test that the pre-encoded tools/list payload is built once and reused"""
+        payload = await encoded_tools()
+        assert payload is await encoded_tools()
+
+        tools = json.loads(bytes(payload))
+        assert [tool["name"] for tool in tools] == [t.name for t in await handle_list_tools()]
+
+        # The pre-encoded payload is spliced into the JSON-RPC envelope as-is
+        envelope = json.loads(rpc_encoder.encode(RpcOk(id=7, result={"tools": payload})))
+        assert envelope["jsonrpc"] == "2.0"
+        assert envelope["id"] == 7
+        assert envelope["result"]["tools"] == tools
+
     async def test_sql_query_tool(self, initialized_global_server):
         """Test the sql_query tool"""
         # Test successful query
@@ -47,6 +86,28 @@ class TestMCPTools:
         assert len(result) == 1
         assert "Product A" in result[0].text or "Product B" in result[0].text
 
+    async def test_sql_query_tool_arrow_format(self, initialized_global_server):
+        """Test the sql_query tool returning an Arrow IPC stream"""
+        result = await handle_call_tool(
+            "sql_query",
+            {"query": "SELECT order_id, price FROM sales ORDER BY order_id", "response_format": "arrow"},
+        )
+        assert len(result) == 1
+        assert isinstance(result[0], types.EmbeddedResource)
+        assert result[0].resource.mimeType == "application/vnd.apache.arrow.stream"
+
+        table = pa.ipc.open_stream(base64.b64decode(result[0].resource.blob)).read_all()
+        assert table.column_names == ["order_id", "price"]
+        assert table.num_rows == 100
+        assert table.column("order_id")[0].as_py() == 1
+
+        # The full result is returned, not the capped text preview
+        result = await handle_call_tool(
+            "sql_query", {"query": "SELECT * FROM range(5000)", "response_format": "arrow"}
+        )
+        table = pa.ipc.open_stream(base64.b64decode(result[0].resource.blob)).read_all()
+        assert table.num_rows == 5000
+
     async def test_sql_query_tool_error(self, initialized_global_server):
         """Test sql_query tool error handling"""
         result = await handle_call_tool("sql_query", {"query": "SELECT * FROM invalid_table"})
@@ -68,12 +129,80 @@ class TestMCPTools:
         assert "order_id" in result[0].text
         assert "Schema:" in result[0].text
 
+    async def test_describe_table_tool_mixed_case(self, initialized_global_server):
+        """Test describe_table with a table name in a different case"""
+        result = await handle_call_tool("describe_table", {"table_name": "Sales"})
+        assert result[0].text.startswith("Table: sales\n")
+        assert "order_id" in result[0].text
+
     async def test_describe_table_tool_invalid(self, initialized_global_server):
         """Test describe_table tool with invalid table"""
         result = await handle_call_tool("describe_table", {"table_name": "invalid_table"})
         assert len(result) == 1
         assert "Error" in result[0].text
 
+    async def test_describe_table_output_cached(self, initialized_global_server):
+        """Test that formatted table descriptions are reused until the schema changes"""
+        first = await handle_call_tool("describe_table", {"table_name": "sales"})
+        hits = _format_describe.cache_info().hits
+        second = await handle_call_tool("describe_table", {"table_name": "sales"})
+        assert second[0].text == first[0].text
+        assert _format_describe.cache_info().hits == hits + 1
+
+        generation = initialized_global_server.schema_generation
+        try:
+            await handle_call_tool("sql_query", {"query": "CREATE TABLE scratch AS SELECT 1 AS x"})
+            assert initialized_global_server.schema_generation > generation
+            result = await handle_call_tool("list_tables", {})
+            assert "scratch" in result[0].text
+        finally:
+            await handle_call_tool("sql_query", {"query": "DROP TABLE IF EXISTS scratch"})
+
+    async def test_format_racing_invalidation_not_served(self, initialized_global_server):
+        """Test that output formatted across a schema change is not served afterwards"""
+        server = initialized_global_server
+        stale = _format_describe("sales", server.schema_generation)
+        # Simulates a format that started before a reload finished
+        server.invalidate()
+        server.available_datasets["sales"]["row_count"] = 7
+        try:
+            result = await handle_call_tool("describe_table", {"table_name": "sales"})
+            assert result[0].text != stale
+            assert "Row count: 7" in result[0].text
+        finally:
+            server.available_datasets["sales"]["row_count"] = 100
+            server.invalidate()
+
+    async def test_unknown_table_keeps_cached_output(self, initialized_global_server):
+        """Test that probing missing tables does not drop cached descriptions"""
+        await handle_call_tool("describe_table", {"table_name": "sales"})
+        cached = _format_describe.cache_info().currsize
+        result = await handle_call_tool("describe_table", {"table_name": "no_such_table"})
+        assert "Error" in result[0].text
+        assert _format_describe.cache_info().currsize == cached
+
+    async def test_list_tables_sees_streamed_ddl(self, initialized_global_server):
+        """Test that DDL run through the streaming helper refreshes cached listings"""
+        await handle_call_tool("list_tables", {})
+        try:
+            await execute_sql_query("CREATE TABLE streamed AS SELECT 1 AS x")
+            result = await handle_call_tool("list_tables", {})
+            assert "streamed" in result[0].text
+        finally:
+            await execute_sql_query("DROP TABLE IF EXISTS streamed")
+
+    async def test_list_tables_sees_commented_ddl(self, initialized_global_server):
+        """Test that DDL after a leading comment still refreshes cached listings"""
+        await handle_call_tool("list_tables", {})
+        try:
+            await handle_call_tool(
+                "sql_query", {"query": "-- make scratch\nCREATE TABLE scratch AS SELECT 1 AS x"}
+            )
+            result = await handle_call_tool("list_tables", {})
+            assert "scratch" in result[0].text
+        finally:
+            await handle_call_tool("sql_query", {"query": "DROP TABLE IF EXISTS scratch"})
+
     async def test_list_tables_tool(self, initialized_global_server):
         """Test the list_tables tool"""
         result = await handle_call_tool("list_tables", {})
@@ -102,6 +231,16 @@ class TestMCPResources:
         assert any("customers" in name for name in resource_names)
         assert any("Schema" in name for name in resource_names)
 
+    async def test_encoded_resources_invalidation(self, initialized_global_server):
+        """Test that the resources/list payload is re-encoded when datasets change"""
+        payload = await encoded_resources()
+        assert payload is await encoded_resources()
+        resources = json.loads(bytes(payload))
+        assert "dataset://sales" in [resource["uri"] for resource in resources]
+
+        initialized_global_server.datasets_version += 1
+        assert await encoded_resources() is not payload
+
     async def test_read_dataset_resource(self, initialized_global_server):
         """Test reading a dataset resource"""
         uri = AnyUrl("dataset://sales")
@@ -109,6 +248,28 @@ class TestMCPResources:
         assert "success" in content
         assert "data" in content
 
+        # Resource content is valid JSON, including date/timestamp columns
+        result = json.loads(content)
+        assert result["success"] is True
+        assert result["row_count"] == 10
+        assert isinstance(result["data"][0]["order_date"], str)
+
+    async def test_read_dataset_resource_pushdown(self, initialized_global_server):
+        """Test column/limit/offset query parameters on a dataset resource"""
+        content = await handle_read_resource(
+            AnyUrl("dataset://sales?cols=order_id,product&limit=3&offset=5")
+        )
+        result = json.loads(content)
+        assert result["row_count"] == 3
+        assert result["columns"] == ["order_id", "product"]
+        assert [row["order_id"] for row in result["data"]] == [6, 7, 8]
+
+        with pytest.raises(ValueError, match="Unknown column"):
+            await handle_read_resource(AnyUrl("dataset://sales?cols=order_id,nope"))
+
+        with pytest.raises(ValueError, match="Invalid limit"):
+            await handle_read_resource(AnyUrl("dataset://sales?limit=-1"))
+
     async def test_read_schema_resource(self, initialized_global_server):
         """Test reading the schema resource"""
         uri = AnyUrl("schema://all")
@@ -116,6 +277,15 @@ class TestMCPResources:
         assert "tables" in content
         assert "datasets_info" in content
 
+        # A single table can be requested instead of the full schema
+        content = await handle_read_resource(AnyUrl("schema://all?table=sales"))
+        assert "order_id" in content
+        assert "customers" not in content
+
+        # Table names match case-insensitively, as in DuckDB
+        content = await handle_read_resource(AnyUrl("schema://all?table=Sales"))
+        assert '"table":"sales"' in content.replace(" ", "")
+
     async def test_read_invalid_resource(self, initialized_global_server):
         """Test reading an invalid resource"""
         with pytest.raises(ValueError):
@@ -123,3 +293,44 @@ class TestMCPResources:
 
         with pytest.raises(ValueError):
             await handle_read_resource(AnyUrl("dataset://nonexistent"))
+
+
+class TestSSEStream:
+    """Test cases for the SSE session stream"""
+
+    async def test_stream_delivers_queued_messages(self):
+        """Test that queued responses are emitted as SSE data events"""
+        queue = asyncio.Queue()
+        sse_sessions["test-session"] = queue
+        stream = sse_stream("test-session", queue)
+
+        assert (await anext(stream)).startswith(b"event: connected")
+        queue.put_nowait(b'{"jsonrpc":"2.0","id":1,"result":{}}')
+        assert await anext(stream) == b'data: {"jsonrpc":"2.0","id":1,"result":{}}\n\n'
+
+        # Closing the stream (client disconnect) unregisters the session
+        await stream.aclose()
+        assert "test-session" not in sse_sessions
+
+
+class TestHTTPEndpoints:
+    """Test cases for the module-level Starlette app"""
+
+    def test_tools_list_over_http(self):
+        """Test a JSON-RPC tools/list round trip through the message endpoint"""
+        client = TestClient(starlette_app)
+        response = client.post("/messages", json={"jsonrpc": "2.0", "method": "tools/list", "id": 1})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["id"] == 1
+        assert {tool["name"] for tool in body["result"]["tools"]} == {
+            "sql_query",
+            "describe_table",
+            "list_tables",
+        }
+
+    def test_unknown_method_over_http(self):
+        """Test that unknown JSON-RPC methods return a method-not-found error"""
+        client = TestClient(starlette_app)
+        response = client.post("/messages", json={"jsonrpc": "2.0", "method": "nope", "id": 2})
+        assert response.json()["error"]["code"] == -32601
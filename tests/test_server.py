@@ -1,7 +1,15 @@
 """
 Unit tests for the DataQueryServer class
 """
-from data_query_server.server import DataQueryServer
+import asyncio
+import os
+
+from data_query_server.server import (
+    CATALOG_SQL,
+    DataQueryServer,
+    execute_sql_query,
+    list_available_tables,
+)
 
 
 class TestDataQueryServer:
@@ -32,6 +40,28 @@ class TestDataQueryServer:
         assert "name" in customers_info["columns"]
         assert "email" in customers_info["columns"]
 
+    async def test_sample_data_persisted_to_parquet(self, data_server_instance):
+        """Test that sample data is persisted and reattached as Parquet-backed views"""
+        for name in ("sales", "customers"):
+            assert os.path.exists(data_server_instance._parquet_path(name))
+
+        server = DataQueryServer()
+        await server.initialize()
+        # A database that already holds matching datasets is used as-is
+        assert server.reuse_existing_datasets()
+
+        server.attach_parquet_datasets()
+        kinds = dict(
+            server.conn.execute(
+                "SELECT table_name, table_type FROM information_schema.tables "
+                "WHERE table_name IN ('sales', 'customers')"
+            ).fetchall()
+        )
+        assert kinds == {"sales": "VIEW", "customers": "VIEW"}
+        assert server.available_datasets["sales"]["row_count"] == 100
+        assert server.available_datasets["customers"]["row_count"] == 50
+        server.cleanup()
+
     async def test_sql_query_execution(self, data_server_instance):
         """Test SQL query execution functionality"""
         # Test successful query
@@ -48,6 +78,110 @@ class TestDataQueryServer:
         assert result["row_count"] == 3
         assert all("product" in row and "count" in row for row in result["data"])
 
+        # The Arrow table backing the result is returned alongside the rows
+        assert result["arrow"].num_rows == result["row_count"]
+        assert result["arrow"].column_names == result["columns"]
+
+    async def test_unbounded_query_is_capped(self, data_server_instance):
+        """Test that queries without a LIMIT are capped at max_rows"""
+        result = data_server_instance.execute_sql("SELECT * FROM range(5000) ORDER BY 1 DESC")
+        assert result["success"] is True
+        assert result["truncated"] is True
+        assert result["row_count"] == 1000
+        assert result["data"][0]["range"] == 4999
+
+        result = data_server_instance.execute_sql("SELECT * FROM sales", max_rows=200)
+        assert result["truncated"] is False
+        assert result["row_count"] == 100
+
+        # An explicit LIMIT is left alone
+        result = data_server_instance.execute_sql("SELECT * FROM range(5000) LIMIT 2000")
+        assert result["truncated"] is False
+        assert result["row_count"] == 2000
+
+        # Capping does not rename duplicate columns of a join
+        join = "SELECT * FROM sales s JOIN customers c ON s.customer_id = c.customer_id"
+        capped = data_server_instance.execute_sql(join)
+        limited = data_server_instance.execute_sql(f"{join} LIMIT 3")
+        assert capped["columns"] == limited["columns"]
+        assert capped["columns"].count("customer_id") == 2
+
+        # Trailing semicolons and comments do not stop the cap from applying
+        for query in ["SELECT * FROM range(5000);;", "SELECT * FROM range(5000); -- all of it"]:
+            result = data_server_instance.execute_sql(query)
+            assert result["success"] is True
+            assert result["truncated"] is True
+            assert result["row_count"] == 1000
+
+    async def test_stream_sql_preview(self, data_server_instance):
+        """Test that a streamed result only converts the requested preview rows"""
+        with data_server_instance.stream_sql("SELECT * FROM range(100000)", batch_size=64) as stream:
+            assert stream.columns == ["range"]
+            assert stream.to_preview_rows(3) == [{"range": 0}, {"range": 1}, {"range": 2}]
+            assert stream.has_more_than(3)
+            # Only the first batch has been pulled from DuckDB
+            assert stream._fetched == 64
+            assert stream.read_all().num_rows == 100000
+
+    async def test_read_only_mode(self, data_server_instance, tmp_path):
+        """Test that read-only mode rejects writes and keeps DuckDB off the filesystem"""
+        # File access is locked for the whole database, so use a private one
+        server = DataQueryServer()
+        server.db_path = ":memory:"
+        server.read_only = True
+        await server.initialize()
+        try:
+            result = server.execute_sql("SELECT COUNT(*) AS count FROM sales")
+            assert result["success"] is True
+            for query in ["SELECT 1;;", "SELECT 1; -- done"]:
+                assert server.execute_sql(query)["success"] is True
+            assert server.execute_sql("SELECT * FROM customers LIMIT 1")["success"] is True
+
+            for query in [
+                "DROP TABLE sales",
+                "INSERT INTO sales (order_id) VALUES (1)",
+                "SELECT 1; DELETE FROM sales",
+                "SET enable_external_access = true",
+            ]:
+                result = server.execute_sql(query)
+                assert result["success"] is False
+                assert "Read-only mode" in result["error"]
+
+            secret = tmp_path / "secret.csv"
+            secret.write_text("token\nsecret-value\n")
+            for query in [
+                f"SELECT * FROM read_csv('{secret}')",
+                f"SELECT * FROM '{secret}'",
+                f"SELECT * FROM sniff_csv('{secret}')",
+                f"SELECT * FROM read_json_objects('{secret}')",
+                f"SELECT * FROM read_text('{secret}')",
+            ]:
+                result = server.execute_sql(query)
+                assert result["success"] is False
+                assert "secret-value" not in result["error"]
+
+            assert server.get_table_info("sales")["metadata"]["row_count"] == 100
+        finally:
+            server.cleanup()
+
+    async def test_concurrent_async_queries(self, data_server_instance):
+        """Test that queries run concurrently on the worker pool"""
+        queries = [f"SELECT COUNT(*) AS count FROM sales WHERE order_id > {i}" for i in range(8)]
+        results = await asyncio.gather(
+            *(data_server_instance.execute_sql_async(query) for query in queries)
+        )
+        assert [result["data"][0]["count"] for result in results] == [100 - i for i in range(8)]
+
+    async def test_concurrent_module_helpers(self, initialized_global_server):
+        """Test that the module-level helpers run side by side on worker cursors"""
+        preview, tables = await asyncio.gather(
+            execute_sql_query("SELECT order_id FROM sales ORDER BY order_id"),
+            list_available_tables(),
+        )
+        assert "(showing first 100 rows)" not in preview
+        assert "**sales**" in tables
+        assert "**customers**" in tables
+
     async def test_sql_query_error_handling(self, data_server_instance):
         """Test SQL query error handling"""
         # Test invalid query
@@ -57,6 +191,50 @@ class TestDataQueryServer:
         assert result["row_count"] == 0
         assert result["data"] == []
 
+    async def test_execute_sql_without_rows(self, data_server_instance):
+        """Test that row dicts can be skipped when only the Arrow table is needed"""
+        result = data_server_instance.execute_sql("SELECT * FROM sales", include_rows=False)
+        assert result["success"] is True
+        assert result["data"] is None
+        assert result["row_count"] == 100
+        assert result["arrow"].num_rows == 100
+
+    async def test_repeated_query_reuses_statement(self, data_server_instance):
+        """Test that repeated query text is parsed once and served from the cache"""
+        query = "SELECT * FROM sales LIMIT 10"
+        first = data_server_instance.execute_sql(query)
+        stmt = data_server_instance._stmt_cache[query]
+
+        second = data_server_instance.execute_sql(query)
+        assert data_server_instance._stmt_cache[query] is stmt
+        assert second["columns"] == first["columns"]
+        assert second["row_count"] == 10
+
+    async def test_catalog_and_preview_statements_prewarmed(self, data_server_instance):
+        """Test that initialize parses catalog and default preview queries up front"""
+        cache = data_server_instance._stmt_cache
+        assert CATALOG_SQL in cache
+        for name in ["sales", "customers"]:
+            assert data_server_instance.preview_query(name) in cache
+
+    async def test_count_star_from_metadata(self, data_server_instance):
+        """Test that bare COUNT(*) on a dataset is answered from its metadata"""
+        result = data_server_instance.execute_sql("SELECT COUNT(*) AS n FROM sales;")
+        assert result["success"]
+        assert result["data"] == [{"n": 100}]
+
+        # Statements that cannot write keep the shortcut
+        for query in ["SHOW TABLES", "SUMMARIZE sales", "PRAGMA version", "EXPLAIN SELECT 1"]:
+            assert data_server_instance.execute_sql(query)["success"]
+        assert data_server_instance._count_from_metadata("SELECT COUNT(*) FROM sales") is not None
+
+        # Once anything may have written, counts come from DuckDB again
+        data_server_instance.execute_sql("CREATE TABLE scratch AS SELECT 1 AS x")
+        data_server_instance.execute_sql("DROP TABLE scratch")
+        assert data_server_instance._count_from_metadata("SELECT COUNT(*) FROM customers") is None
+        result = data_server_instance.execute_sql("SELECT COUNT(*) AS n FROM customers")
+        assert result["data"] == [{"n": 50}]
+
     async def test_get_table_info_all(self, data_server_instance):
         """Test getting information about all tables"""
         info = data_server_instance.get_table_info()
@@ -79,6 +257,50 @@ class TestDataQueryServer:
         expected_columns = ["order_id", "customer_id", "product", "quantity", "price", "order_date"]
         assert set(schema_columns) == set(expected_columns)
 
+        # Catalog types match what DESCRIBE reports, in column order
+        describe = data_server_instance.conn.execute('DESCRIBE "sales"').fetchall()
+        assert [(col["column"], col["type"]) for col in info["schema"]] == [
+            (row[0], row[1]) for row in describe
+        ]
+
+    async def test_get_table_info_case_insensitive(self, data_server_instance):
+        """Test that table names are matched case-insensitively, like DuckDB does"""
+        info = data_server_instance.get_table_info("SALES")
+        assert info["table"] == "sales"
+        assert info["metadata"]["row_count"] == 100
+
+        data_server_instance.execute_sql("CREATE TABLE MixedCase AS SELECT 1 AS x")
+        info = data_server_instance.get_table_info("mixedcase")
+        assert info["table"] == "MixedCase"
+        assert info["schema"] == [{"column": "x", "type": "INTEGER"}]
+
+    async def test_get_table_info_unknown_table(self, data_server_instance):
+        """Test that names outside the catalog are rejected without reaching SQL"""
+        info = data_server_instance.get_table_info("sales; DROP TABLE sales")
+        assert info == {"error": "Table not found: sales; DROP TABLE sales"}
+        assert "sales" in data_server_instance.get_table_info()["tables"]
+
+    async def test_schema_snapshot_cached(self, data_server_instance):
+        """Test that table info is served from the schema cache until invalidated"""
+        data_server_instance.get_table_info()
+        snapshot = data_server_instance._schema_cache
+        assert set(snapshot) == {"customers", "sales"}
+
+        data_server_instance.get_table_info("sales")
+        assert data_server_instance._schema_cache is snapshot
+
+        # Read-only queries do not invalidate the snapshot
+        data_server_instance.execute_sql("SELECT * FROM sales WHERE product = 'CREATE'")
+        assert data_server_instance._schema_dirty is False
+
+        result = data_server_instance.execute_sql("CREATE TABLE scratch AS SELECT 1 AS x")
+        assert result["success"] is True
+        assert data_server_instance._schema_dirty is True
+        assert "scratch" in data_server_instance.get_table_info()["tables"]
+
+        data_server_instance.execute_sql("DROP TABLE scratch")
+        assert "scratch" not in data_server_instance.get_table_info()["tables"]
+
     async def test_cleanup(self):
         """Test server cleanup functionality"""
         server = DataQueryServer()